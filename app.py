@@ -1,250 +1,383 @@
-# app.py
-# Run:
-#   pip install streamlit pandas numpy plotly matplotlib
-#   streamlit run app.py
-
-import os, hmac, streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-from datetime import datetime
-from pathlib import Path
-
-# --------------------------- Page Config ---------------------------
-st.set_page_config(page_title="PowerPlay", layout="wide")
-
-# --------------------------- Security: Access Gate ---------------------------
-def access_gate():
-    """Simple shared-password gate (reads from Streamlit Secrets or APP_PASSWORD env)."""
-    app_pw = st.secrets.get("APP_PASSWORD") or os.environ.get("APP_PASSWORD")
-    if not app_pw:
-        st.warning("APP password not configured. Set APP_PASSWORD in .streamlit/secrets.toml (local) or Secrets (Cloud).")
-        return
-    if not st.session_state.get("authed", False):
-        with st.form("auth_form", clear_on_submit=False):
-            st.markdown("### 🔒 Enter Access Password")
-            pw = st.text_input("Password", type="password")
-            ok = st.form_submit_button("Enter")
-        if ok:
-            if hmac.compare_digest(str(pw), str(app_pw)):
-                st.session_state.authed = True
-                try: st.rerun()
-                except AttributeError: st.experimental_rerun()
-            else:
-                st.error("Access denied.")
-        st.stop()  # halt until authenticated
-
-# --------------------------- Chart builders ---------------------------
-from ichart_from_history_csv import build_ichart_from_history
-from ichart_from_current_csv import build_ichart_from_current
-from ichart_from_ai_csv import build_ichart_from_ai
-
-# --------------------------- Theme & Colors ---------------------------
-DARK_BLUE      = "#003366"
-LIGHT_GRAY     = "#F5F5F5"
-DARK_GRAY      = "#333333"
-SKY_BLUE       = "#87CEEB"
-EMERALD        = "#28a745"  # Go
-CORAL          = "#FF7F50"  # Back
-LOGOUT_YELLOW  = "#B8860B"  # Dark Yellow (DarkGoldenRod) for Logout
-
-HISTORY_CSV = Path("history_export.csv")
-CURRENT_CSV = Path("current_export.csv")
-AI_CSV      = Path("AI_export.csv")
-
-def inject_button_css(primary_color: str, secondary_color: str):
-    """
-    Strong, DOM-targeted CSS so colors are not overridden by Streamlit theme.
-    - Primary buttons (Go/Back) use data-testid=baseButton-primary
-    - Secondary buttons (Logout) use data-testid=baseButton-secondary
-    Forces secondary text & border to dark yellow; background stays transparent if theme forces white.
-    """
-    st.markdown(
-        f"""
-        <style>
-          .stApp {{ background-color: {LIGHT_GRAY}; }}
-          .pp-center {{ text-align: center; }}
-
-          .powerplay-header {{
-            color: {DARK_BLUE}; font-weight: 800; margin-bottom: 0.2rem;
-          }}
-          .powerplay-sub {{
-            color: {DARK_GRAY}; font-size: 0.95rem; margin-bottom: 1.0rem;
-          }}
-
-          .pp-card {{
-            background: white; border: 1.5px solid {DARK_BLUE};
-            border-radius: 8px; padding: 1rem 1rem 0.6rem 1rem;
-          }}
-          .pp-title {{ color: {DARK_BLUE}; font-weight: 700; margin-bottom: 0.5rem; }}
-          div[data-baseweb="select"] > div {{ background-color: {SKY_BLUE}10; border-radius: 6px; }}
-
-          .pp-plot {{
-            background: white; border: 2px solid {DARK_BLUE};
-            border-radius: 8px; padding: 0.5rem;
-          }}
-
-          .go-logout-row {{ margin-top: 0.40rem; }}
-
-          /* --- Primary buttons (Go / Back) --- */
-          button[data-testid="baseButton-primary"] {{
-            background-color: {primary_color} !important;
-            color: #ffffff !important;
-            border: none !important;
-            border-radius: 6px !important;
-            padding: 0.5rem 1.0rem !important;
-            font-weight: 600 !important;
-          }}
-          button[data-testid="baseButton-primary"]:hover {{
-            filter: brightness(0.95);
-          }}
-
-          /* --- Secondary buttons (Logout) --- 
-             Some Streamlit themes force white bg; ensure icon/text and border are dark yellow. */
-          button[data-testid="baseButton-secondary"] {{
-            color: {secondary_color} !important;                /* icon/text color */
-            border: 2px solid {secondary_color} !important;     /* border color */
-            border-radius: 8px !important;
-            padding: 0.50rem 0.85rem !important;
-            font-size: 1.05rem !important;  /* icon size */
-            background: transparent !important;                 /* leave bg as white/transparent */
-          }}
-          button[data-testid="baseButton-secondary"]:hover {{
-            filter: brightness(0.95);
-          }}
-
-          /* --- Fallbacks for older Streamlit builds --- */
-          div.stButton > button[kind="primary"] {{
-            background-color: {primary_color} !important; color: #fff !important; border: none !important;
-          }}
-          div.stButton > button[kind="secondary"] {{
-            color: {secondary_color} !important; border: 2px solid {secondary_color} !important;
-            background: transparent !important; border-radius: 8px !important;
-          }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-# --------------------------- App State ---------------------------
-if "show_chart" not in st.session_state:
-    st.session_state.show_chart = False
-if "selection" not in st.session_state:
-    st.session_state.selection = {}
-
-def do_rerun():
-    try: st.rerun()
-    except AttributeError: st.experimental_rerun()
-
-# --------------------------- Security Gate ---------------------------
-access_gate()
-
-# Inject CSS for CONTROLS screen: Go=emerald (primary), Logout=dark yellow (secondary)
-inject_button_css(primary_color=EMERALD, secondary_color=LOGOUT_YELLOW)
-
-# --------------------------- Header ---------------------------
-st.markdown("<div class='pp-center'><h1 class='powerplay-header'>Welcome to PowerPlay</h1></div>", unsafe_allow_html=True)
-st.markdown("<div class='pp-center powerplay-sub'>Your intelligent assistant to thermal plant boiler performance analysis.</div>", unsafe_allow_html=True)
-
-# --------------------------- Controls / Chart ---------------------------
-PARAM_MAP = {
-    "Bed Temperature": "BED TEMPERATURE",
-    "Bed Height": "BED HEIGHT",
-    "Screen Inlet Temperature": "SCREEN INLET TEMPERATURE",
-    "APH Outlet Temperature": "APH OUTLET TEMPERATURE",
-    "SH3 Outlet Temperature": "SH3 OUTLET TEMPERATURE",
-}
-SNAPSHOT_OPTIONS = ["History Snapshot", "Current Snapshot", "AI Snapshot"]
-WINDOW_OPTIONS_CURRENT = [20, 40, 60]
-WINDOW_OPTIONS_AI = [20, 40, 60]
-
-if not st.session_state.show_chart:
-    st.markdown("<div class='pp-card'>", unsafe_allow_html=True)
-    st.markdown("<div class='pp-title'>Critical Parameters</div>", unsafe_allow_html=True)
-
-    param_name = st.selectbox("Select a critical parameter", list(PARAM_MAP.keys()), index=0, key="param_select")
-    tag = PARAM_MAP[param_name]
-
-    snapshot = st.radio("Select snapshot", SNAPSHOT_OPTIONS, index=0, horizontal=True, key="snapshot_select")
-
-    if snapshot == "History Snapshot":
-        st.selectbox("Time Window (predefined)", ["Predefined"], index=0, disabled=True,
-                     label_visibility="collapsed", key="window_disabled")
-        window = None
-    elif snapshot == "Current Snapshot":
-        window = st.selectbox("Time Window (minutes)", WINDOW_OPTIONS_CURRENT, index=0, key="window_current")
-    else:  # AI Snapshot
-        window = st.selectbox("Time Window (minutes)", WINDOW_OPTIONS_AI, index=0, key="window_ai")
-
-    # ---------- Bottom row of the controls card ----------
-    st.markdown("<div class='go-logout-row'>", unsafe_allow_html=True)
-    col_go, col_spacer, col_logout = st.columns([0.18, 0.67, 0.15])
-    with col_go:
-        # Go button as PRIMARY
-        go_clicked = st.button("Go", key="go_button", type="primary")
-    with col_logout:
-        # Logout icon as SECONDARY (dark yellow text/border; bg transparent)
-        logout_clicked = st.button("🟨⎋", key="logout_btn", help="Logout", type="secondary")
-    st.markdown("</div>", unsafe_allow_html=True)
-    # -----------------------------------------------------
-
-    # Actions
-    if go_clicked:
-        st.session_state.selection = {"param": param_name, "tag": tag, "snapshot": snapshot, "window": window}
-        st.session_state.show_chart = True
-        do_rerun()
-
-    if logout_clicked:
-        st.session_state.pop("authed", None)
-        do_rerun()
-
-    st.markdown("</div>", unsafe_allow_html=True)  # end card
-
-else:
-    sel = st.session_state.selection
-    st.markdown("<div class='pp-plot'>", unsafe_allow_html=True)
-
-    if sel["snapshot"] == "History Snapshot":
-        try:
-            fig = build_ichart_from_history(str(HISTORY_CSV), sel["tag"])
-            st.pyplot(fig, width='stretch', clear_figure=True)
-        except Exception as e:
-            st.error(f"History Snapshot error: {e}")
-
-    elif sel["snapshot"] == "Current Snapshot":
-        try:
-            minutes = int(sel["window"] or 20)
-            fig = build_ichart_from_current(str(CURRENT_CSV), sel["tag"], minutes)
-            st.pyplot(fig, width='stretch', clear_figure=True)
-        except Exception as e:
-            st.error(f"Current Snapshot error: {e}")
-
-    else:  # AI Snapshot
-        try:
-            minutes = int(sel["window"] or 20)
-            fig = build_ichart_from_ai(str(AI_CSV), sel["tag"], minutes)
-            st.pyplot(fig, width='stretch', clear_figure=True)
-        except Exception as e:
-            st.error(f"AI Snapshot error: {e}")
-
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # --------- Bottom row on the chart screen: Back (center) + Logout (right) ---------
-    # Re-inject CSS so PRIMARY=coral for Back; Logout remains dark yellow secondary.
-    inject_button_css(primary_color=CORAL, secondary_color=LOGOUT_YELLOW)
-
-    row_left, row_center, row_right = st.columns([0.4, 0.2, 0.4])
-    with row_center:
-        back_clicked = st.button("Back", key="back_btn", type="primary")
-    with row_right:
-        logout_clicked_chart = st.button("🟨⎋", key="logout_btn_chart", help="Logout", type="secondary")
-
-    # Actions (chart screen)
-    if logout_clicked_chart:
-        st.session_state.pop("authed", None)
-        do_rerun()
-    if back_clicked:
-        st.session_state.show_chart = False
-        st.session_state.selection = {}
-        do_rerun()
-
+# app.py
+# Run:
+#   pip install streamlit pandas numpy plotly matplotlib
+#   streamlit run app.py
+
+import io, os, hmac, streamlit as st
+import pandas as pd
+from pathlib import Path
+
+# --------------------------- Page Config ---------------------------
+st.set_page_config(page_title="PowerPlay", layout="wide")
+
+# --------------------------- Security: Access Gate ---------------------------
+def access_gate():
+    """Simple shared-password gate (reads from Streamlit Secrets or APP_PASSWORD env)."""
+    app_pw = st.secrets.get("APP_PASSWORD") or os.environ.get("APP_PASSWORD")
+    if not app_pw:
+        st.warning("APP password not configured. Set APP_PASSWORD in .streamlit/secrets.toml (local) or Secrets (Cloud).")
+        return
+    if not st.session_state.get("authed", False):
+        with st.form("auth_form", clear_on_submit=False):
+            st.markdown("### 🔒 Enter Access Password")
+            pw = st.text_input("Password", type="password")
+            ok = st.form_submit_button("Enter")
+        if ok:
+            if hmac.compare_digest(str(pw), str(app_pw)):
+                st.session_state.authed = True
+                try: st.rerun()
+                except AttributeError: st.experimental_rerun()
+            else:
+                st.error("Access denied.")
+        st.stop()  # halt until authenticated
+
+# --------------------------- Chart builders ---------------------------
+# Imported lazily inside the render functions: the builder modules pull in
+# matplotlib/plotly transitively, which the controls screen never needs.
+# sys.modules caches them, so selections after the first are free.
+
+# Feature flag: Plotly/WebGL rendering by default (client-side GPU draw, JSON
+# payload). Set PP_USE_PLOTLY=0 to fall back to the Matplotlib builders.
+USE_PLOTLY = os.environ.get("PP_USE_PLOTLY", "1") != "0"
+
+# --------------------------- Cached CSV loading ---------------------------
+# The column projection and the pyarrow-first reader live in ichart_core so
+# the app and the chart builders share one implementation (adding a chart
+# column means editing one tuple, not two).
+from ichart_core import _NEEDED_COLS, _read_csv
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _csv_mtime(path: str) -> float:
+    """Cheap freshness probe, re-stat'ed at most every 30s."""
+    return Path(path).stat().st_mtime
+
+@st.cache_resource(max_entries=6, show_spinner=False)
+def _load_csv(path: str, mtime: float) -> pd.DataFrame:
+    """Parse a CSV once per (path, mtime) as a process-wide singleton: every
+    session shares the same in-memory frame (cache_resource returns the object
+    itself, not a per-session copy), so memory stays O(1) in concurrent users.
+    The builders treat the frame as read-only and .copy() their slices.
+    max_entries bounds the cache: each mtime tick of a live export is a new
+    key, so without it every rewrite would pin another full frame forever.
+
+    The CSV stays the input-of-record, but a sibling .parquet file is kept as a
+    parse cache: columnar, typed and compressed, so a cold re-read (new process,
+    cache eviction) skips text parsing entirely. Regenerated whenever the CSV
+    is newer; falls back to plain read_csv if pyarrow/parquet is unavailable.
+    """
+    csv_path = Path(path)
+    pq_path = csv_path.with_suffix(".parquet")
+    try:
+        if not pq_path.exists() or pq_path.stat().st_mtime < mtime:
+            df = _read_csv(path)
+            df.to_parquet(pq_path, engine="pyarrow")
+            return df
+        return pd.read_parquet(pq_path, engine="pyarrow")
+    except Exception:
+        return _read_csv(path)
+
+def load_snapshot_df(path: Path) -> pd.DataFrame:
+    """mtime-keyed cached load so edits to the export files invalidate the cache."""
+    return _load_csv(str(path), _csv_mtime(str(path)))
+
+@st.cache_data(max_entries=6, show_spinner=False)
+def _read_csv_head(path: str, mtime: float, approx_bytes: int = 2_000_000) -> pd.DataFrame:
+    """Byte-ranged fast path: parse only the first ~2MB of the CSV.
+
+    The exports are written latest-first, so the freshest rows sit at the TOP
+    of the file — a bounded head read covers any minutes window regardless of
+    how large the file grows. The trailing partial line is dropped.
+    """
+    if os.path.getsize(path) <= approx_bytes:
+        return _load_csv(path, mtime)
+    with open(path, "rb") as f:
+        chunk = f.read(approx_bytes)
+    chunk = chunk[: chunk.rfind(b"\n") + 1]
+    return pd.read_csv(io.BytesIO(chunk), usecols=lambda c: c in _NEEDED_COLS,
+                       engine="c", low_memory=False)
+
+def load_window_df(path: Path, tag: str, minutes: int) -> pd.DataFrame:
+    """Windowed load for Current/AI snapshots: try the byte-ranged head read and
+    fall back to the full cached load if the slice is short on rows for `tag`."""
+    from ichart_core import param_groups
+    d = _read_csv_head(str(path), _csv_mtime(str(path)))
+    idx = param_groups(d).get(str(tag).upper())
+    if idx is not None and len(idx) >= int(minutes):
+        return d
+    return load_snapshot_df(path)
+
+# --------------------------- Cached chart rendering ---------------------------
+# Dispatch: snapshot label -> (builder, source CSV). Builders for Current/AI take
+# a minutes window; History plots the whole predefined range (minutes=None).
+def _snapshot_builders():
+    from ichart_from_history_csv import build_ichart_from_history_df
+    from ichart_from_current_csv import build_ichart_from_current_df
+    from ichart_from_ai_csv import build_ichart_from_ai_df
+    return {
+        "History Snapshot": (build_ichart_from_history_df, HISTORY_CSV),
+        "Current Snapshot": (build_ichart_from_current_df, CURRENT_CSV),
+        "AI Snapshot":      (build_ichart_from_ai_df,      AI_CSV),
+    }
+
+# --------------------------- Incremental stats (Current export) ---------------------------
+@st.cache_resource(show_spinner=False)
+def _running_stats_state() -> dict:
+    """Process-wide per-file state for the incremental stats accumulators:
+    {path: {"offset": bytes consumed, "header": [...], "acc": {TAG: RunningIChartStats}}}."""
+    return {}
+
+def incremental_current_stats(path: Path, tag: str):
+    """O(Δ) control-limit stats for a growing export: parse only the bytes
+    appended since the last call and fold them into a running mean/moving-range
+    accumulator (ichart_stats.RunningIChartStats). Returns (mean, UCL, LCL).
+
+    If the file shrank or was rewritten in place (offset no longer valid), the
+    state resets and the file is consumed from the top again.
+    """
+    from ichart_stats import RunningIChartStats
+    state = _running_stats_state()
+    key = str(path)
+    size = path.stat().st_size
+    entry = state.get(key)
+    if entry is None or size < entry["offset"]:
+        entry = {"offset": 0, "header": None, "acc": {}}
+        state[key] = entry
+    if size > entry["offset"]:
+        with open(path, "rb") as f:
+            if entry["header"] is None:
+                entry["header"] = f.readline().decode("utf-8-sig").strip().split(",")
+                entry["offset"] = f.tell()
+            f.seek(entry["offset"])
+            new_bytes = f.read()
+        new_bytes = new_bytes[: new_bytes.rfind(b"\n") + 1]
+        entry["offset"] += len(new_bytes)
+        if new_bytes:
+            dfnew = pd.read_csv(io.BytesIO(new_bytes), names=entry["header"],
+                                engine="c", low_memory=False)
+            groups = dfnew.groupby(dfnew["parameter_name"].astype(str).str.upper())
+            for t, grp in groups:
+                acc = entry["acc"].setdefault(t, RunningIChartStats())
+                acc.update(pd.to_numeric(grp["value"], errors="coerce").to_numpy())
+    acc = entry["acc"].get(str(tag).upper())
+    if acc is None or acc.n == 0:
+        raise ValueError(f"No rows for parameter_name='{tag}' in {path}")
+    return acc.stats()
+
+def _current_stats_override(df: pd.DataFrame, path: Path, tag: str):
+    """(mean, sigma) from the incremental accumulator, but only when the export
+    lacks precomputed stats columns; those stay authoritative when present."""
+    if "Current_Mean_Value" in df.columns and "Current_Sigma_Value" in df.columns:
+        return None
+    try:
+        mean, ucl, _ = incremental_current_stats(path, tag)
+        return (mean, (ucl - mean) / 3.0)
+    except Exception:
+        return None
+
+def render_chart(snapshot: str, tag: str, minutes, mtime: float):
+    """Build the Matplotlib figure for a selection. Not cached itself: the
+    PNG-bytes cache below memoizes per (snapshot, tag, window, file-mtime),
+    and the figure goes back to the ichart_core pool once serialized."""
+    builder, path = _snapshot_builders()[snapshot]
+    if minutes is None:
+        df = load_snapshot_df(path)
+        return builder(df, tag, source=str(path))
+    df = load_window_df(path, tag, int(minutes))
+    if snapshot == "Current Snapshot":
+        stats = _current_stats_override(df, path, tag)
+        if stats is not None:
+            return builder(df, tag, int(minutes), source=str(path), stats=stats)
+    return builder(df, tag, int(minutes), source=str(path))
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_chart_png(snapshot: str, tag: str, minutes, mtime: float) -> bytes:
+    """Rasterize the Matplotlib figure once per selection and cache the PNG
+    bytes; reruns just ship the bytes through st.image instead of re-running
+    the Agg backend."""
+    from ichart_core import release_figure
+    fig = render_chart(snapshot, tag, minutes, mtime)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=110)
+    release_figure(fig)  # serialized; hand the artist tree to the next build
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False)
+def _demo_fig(snapshot: str, window: int):
+    """Stable placeholder chart for when an export CSV is absent (demo mode).
+
+    Cached by (snapshot, window): the synthetic signal and timeline are
+    generated once per selection, so interactions don't redraw a different
+    random plot on every rerun.
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+    n = int(window or 20)
+    seed = int.from_bytes(snapshot.encode()[:4], "little")
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(end=pd.Timestamp.now().floor("min"), periods=n, freq="min")
+    vals = 135.0 + rng.normal(0.0, 1.9, n)
+    fig = go.Figure(go.Scattergl(x=times, y=vals, mode="lines+markers",
+                                 line=dict(color="#555", width=1),
+                                 marker=dict(color="#2E7D32", size=6)))
+    fig.update_layout(
+        height=420, margin=dict(l=40, r=20, t=30, b=40),
+        xaxis_title="Time", yaxis_title="Value",
+        plot_bgcolor="white",
+        title=dict(text=f"{snapshot} — demo data", x=0.5, y=0.02, yanchor="bottom",
+                   font=dict(size=12, color="tomato")),
+    )
+    return fig
+
+# Snapshot label -> source CSV (import-free lookup for the render branch)
+def _snapshot_csv(snapshot: str) -> Path:
+    return {
+        "History Snapshot": HISTORY_CSV,
+        "Current Snapshot": CURRENT_CSV,
+        "AI Snapshot":      AI_CSV,
+    }[snapshot]
+
+# Snapshot label -> precomputed stats columns in the matching export CSV
+_STATS_COLS = {
+    "History Snapshot": ("History_Mean_Value", "History_Sigma_Value"),
+    "Current Snapshot": ("Current_Mean_Value", "Current_Sigma_Value"),
+    "AI Snapshot":      ("AI_Mean_Value",      "AI_Sigma_Value"),
+}
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_chart_plotly(snapshot: str, tag: str, minutes, mtime: float):
+    """Plotly counterpart of render_chart; same cache key, WebGL output."""
+    from ichart_plotly import build_plotly_ichart_df
+    path = _snapshot_csv(snapshot)
+    mean_col, sigma_col = _STATS_COLS[snapshot]
+    df = load_snapshot_df(path) if minutes is None else load_window_df(path, tag, int(minutes))
+    stats = None
+    if snapshot == "Current Snapshot":
+        stats = _current_stats_override(df, path, tag)
+    return build_plotly_ichart_df(
+        df, tag, mean_col=mean_col, sigma_col=sigma_col,
+        window_minutes=minutes, colorize=(snapshot != "History Snapshot"),
+        forward=(snapshot == "AI Snapshot"), stats=stats,
+        source=str(path),
+    )
+
+# --------------------------- Theme & Colors ---------------------------
+from ui_theme import EMERALD, CORAL, LOGOUT_YELLOW, inject_button_css
+
+HISTORY_CSV = Path("history_export.csv")
+CURRENT_CSV = Path("current_export.csv")
+AI_CSV      = Path("AI_export.csv")
+
+# --------------------------- App State ---------------------------
+if "show_chart" not in st.session_state:
+    st.session_state.show_chart = False
+if "selection" not in st.session_state:
+    st.session_state.selection = {}
+
+def do_rerun():
+    try: st.rerun()
+    except AttributeError: st.experimental_rerun()
+
+# --------------------------- Security Gate ---------------------------
+access_gate()
+
+# Single CSS injection per rerun; primary depends on the screen:
+# controls: Go=emerald; chart: Back=coral. Logout stays dark-yellow secondary.
+inject_button_css(
+    primary_color=CORAL if st.session_state.show_chart else EMERALD,
+    secondary_color=LOGOUT_YELLOW,
+)
+
+# --------------------------- Header ---------------------------
+st.markdown("<div class='pp-center'><h1 class='powerplay-header'>Welcome to PowerPlay</h1></div>", unsafe_allow_html=True)
+st.markdown("<div class='pp-center powerplay-sub'>Your intelligent assistant to thermal plant boiler performance analysis.</div>", unsafe_allow_html=True)
+
+# --------------------------- Controls / Chart ---------------------------
+PARAM_MAP = {
+    "Bed Temperature": "BED TEMPERATURE",
+    "Bed Height": "BED HEIGHT",
+    "Screen Inlet Temperature": "SCREEN INLET TEMPERATURE",
+    "APH Outlet Temperature": "APH OUTLET TEMPERATURE",
+    "SH3 Outlet Temperature": "SH3 OUTLET TEMPERATURE",
+}
+SNAPSHOT_OPTIONS = ["History Snapshot", "Current Snapshot", "AI Snapshot"]
+WINDOW_OPTIONS = [20, 40, 60]  # shared by the Current and AI snapshots
+
+if not st.session_state.show_chart:
+    st.markdown("<div class='pp-card'>", unsafe_allow_html=True)
+    st.markdown("<div class='pp-title'>Critical Parameters</div>", unsafe_allow_html=True)
+
+    # Form batches the widgets: changing a selectbox/radio no longer reruns the
+    # whole script — only the Go submit does. The window selector is therefore
+    # always shown (Current and AI share the same options; History ignores it).
+    with st.form("controls", clear_on_submit=False):
+        param_name = st.selectbox("Select a critical parameter", list(PARAM_MAP.keys()), index=0, key="param_select")
+        snapshot = st.radio("Select snapshot", SNAPSHOT_OPTIONS, index=0, horizontal=True, key="snapshot_select")
+        window_choice = st.selectbox("Time Window (minutes — Current/AI snapshots only)",
+                                     WINDOW_OPTIONS, index=0, key="window_select")
+        go_clicked = st.form_submit_button("Go", type="primary")
+
+    tag = PARAM_MAP[param_name]
+    window = None if snapshot == "History Snapshot" else window_choice
+
+    # ---------- Bottom row of the controls card ----------
+    st.markdown("<div class='go-logout-row'>", unsafe_allow_html=True)
+    col_spacer, col_logout = st.columns([0.85, 0.15])
+    with col_logout:
+        # Logout icon as SECONDARY (dark yellow text/border; bg transparent)
+        logout_clicked = st.button("🟨⎋", key="logout_btn", help="Logout", type="secondary")
+    st.markdown("</div>", unsafe_allow_html=True)
+    # -----------------------------------------------------
+
+    # Actions
+    if go_clicked:
+        st.session_state.selection = {"param": param_name, "tag": tag, "snapshot": snapshot, "window": window}
+        st.session_state.show_chart = True
+        do_rerun()
+
+    if logout_clicked:
+        st.session_state.pop("authed", None)
+        do_rerun()
+
+    st.markdown("</div>", unsafe_allow_html=True)  # end card
+
+else:
+    sel = st.session_state.selection
+    st.markdown("<div class='pp-plot'>", unsafe_allow_html=True)
+
+    try:
+        csv_path = _snapshot_csv(sel["snapshot"])
+        minutes = None if sel["snapshot"] == "History Snapshot" else int(sel["window"] or 20)
+        if not csv_path.exists():
+            # Demo fallback: stable cached placeholder instead of an error
+            st.plotly_chart(_demo_fig(sel["snapshot"], minutes or 20),
+                            width="stretch", theme=None)
+        elif USE_PLOTLY:
+            fig = render_chart_plotly(sel["snapshot"], sel["tag"], minutes, _csv_mtime(str(csv_path)))
+            st.plotly_chart(fig, width="stretch", theme=None,
+                            config={"staticPlot": False})
+        else:
+            # Cached PNG bytes: no Agg re-rasterization on reruns
+            png = render_chart_png(sel["snapshot"], sel["tag"], minutes, _csv_mtime(str(csv_path)))
+            st.image(png, width="stretch")
+    except Exception as e:
+        st.error(f"{sel['snapshot']} error: {e}")
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    # --------- Bottom row on the chart screen: Back (center) + Logout (right) ---------
+    # CSS was already injected above with PRIMARY=coral for this screen.
+    row_left, row_center, row_right = st.columns([0.4, 0.2, 0.4])
+    with row_center:
+        back_clicked = st.button("Back", key="back_btn", type="primary")
+    with row_right:
+        logout_clicked_chart = st.button("🟨⎋", key="logout_btn_chart", help="Logout", type="secondary")
+
+    # Actions (chart screen)
+    if logout_clicked_chart:
+        st.session_state.pop("authed", None)
+        do_rerun()
+    if back_clicked:
+        st.session_state.show_chart = False
+        st.session_state.selection = {}
+        do_rerun()
+
@@ -0,0 +1,182 @@
+# ichart_plotly.py
+# Plotly (WebGL) renderers for the snapshot I-charts.
+# - Same data rules as the Matplotlib builders: precomputed mean/sigma columns
+#   are used when present, with a fallback to the memoized moving-range
+#   estimate (ichart_mean_sigma) when they are absent or non-finite; windowed
+#   snapshots take the FIRST N rows (latest-first CSV) and display
+#   oldest->newest.
+# - go.Scattergl draws client-side on the GPU, so large histories stay
+#   responsive and the server ships JSON instead of rasterized PNGs.
+
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+
+from ichart_core import first_num as _first_num, param_slice_df, \
+    parse_ts_series as _parse_ts_series, sort_by_ts
+from ichart_stats import classify_zones, ichart_mean_sigma
+
+GREEN = "#2E7D32"       # within ±1σ
+AMBER = "#FFBF00"       # between 1σ and 3σ
+RED   = "#D32F2F"       # OOC >3σ
+LINE_GRAY    = "#555"
+DESIGN_COLOR = "#9467bd"  # tab:purple
+
+# Cap points per trace; beyond this the payload/draw cost outweighs any visual
+# gain, so we LTTB-downsample (shape-preserving) before building the trace.
+MAX_PLOT_POINTS = 2500
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; returns indices to keep.
+
+    O(N) single pass that preserves the visual shape of the series (peaks,
+    excursions) far better than uniform striding. First/last points always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Bucket boundaries over the interior points (excluding the fixed endpoints)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    a = 0  # previously selected point
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the NEXT bucket (or the last point for the final bucket)
+        nlo, nhi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean() if nhi > nlo else x[-1]
+        avg_y = y[nlo:nhi].mean() if nhi > nlo else y[-1]
+        # Triangle areas between point a, each candidate, and the next-bucket average
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area)) if hi > lo else lo
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+def build_plotly_ichart_df(df: pd.DataFrame, param_name: str, *,
+                           mean_col: str, sigma_col: str,
+                           window_minutes=None, colorize: bool = True,
+                           forward: bool = False, stats=None,
+                           source: str = "<dataframe>") -> go.Figure:
+    """Build a Plotly I-chart from an already-parsed DataFrame.
+
+    mean_col/sigma_col name the snapshot-specific precomputed stats columns
+    (e.g. Current_Mean_Value / Current_Sigma_Value). window_minutes=None plots
+    every row (History); colorize=False keeps a plain line with red OOC dots
+    instead of the green/amber/red point coding. forward=True keeps the
+    EARLIEST window (AI forecasts run forward from now); otherwise the latest.
+    """
+    if "parameter_name" not in df.columns:
+        raise ValueError("CSV must contain a 'parameter_name' column.")
+    # Slice first (memoized group index); conversions below run post-filter,
+    # and only the plotting columns get materialized
+    all_param = param_slice_df(df, param_name, source,
+                               columns=("ts", "value", "param_unit",
+                                        "Design_Value", mean_col, sigma_col))
+
+    if stats is not None:
+        # Externally maintained stats (e.g. incremental accumulator)
+        mean, sigma = float(stats[0]), float(stats[1])
+    else:
+        mean  = _first_num(all_param, mean_col)
+        sigma = _first_num(all_param, sigma_col)
+    if mean is None or sigma is None or not np.isfinite(mean) or not np.isfinite(sigma):
+        # Same fallback as the Matplotlib builders: estimate from the series
+        vals = pd.to_numeric(all_param["value"], errors="coerce").to_numpy()
+        mean, sigma = ichart_mean_sigma(vals)
+    UCL, LCL = mean + 3.0 * sigma, mean - 3.0 * sigma
+
+    d = all_param
+    if "ts" in d.columns:
+        d["ts"] = _parse_ts_series(d["ts"])
+        d = sort_by_ts(d.dropna(subset=["ts"]))
+        if window_minutes is not None:
+            # Window by TIME: searchsorted on the sorted int64-ns axis
+            ts_ns = d["ts"].to_numpy("datetime64[ns]").view("int64")
+            if ts_ns.size:
+                span = int(window_minutes) * 60 * 1_000_000_000
+                if forward:
+                    d = d.iloc[:np.searchsorted(ts_ns, ts_ns[0] + span, side="left")]
+                else:
+                    d = d.iloc[np.searchsorted(ts_ns, ts_ns[-1] - span, side="right"):]
+    else:
+        if window_minutes is not None:
+            d = d.head(int(window_minutes))
+        d = d.iloc[::-1].reset_index(drop=True)
+
+    # downcast at conversion so the column is already float32; to_numpy with
+    # copy=False then hands back the buffer instead of re-casting. float32 is
+    # plenty for display; the mean/sigma/limit scalars stay float64.
+    d["value"] = pd.to_numeric(d["value"], errors="coerce", downcast="float")
+    d = d.dropna(subset=["value"])
+    y = d["value"].to_numpy(dtype=np.float32, copy=False)
+    # ndarray-backed x up front: the mask/downsample indexing below is plain
+    # NumPy fancy-indexing, not pandas __getitem__ dispatch
+    x = d["ts"].to_numpy("datetime64[ns]") if "ts" in d.columns else d.index.to_numpy()
+
+    # Downsample long series before building traces (shape-preserving LTTB)
+    if len(y) > MAX_PLOT_POINTS:
+        if "ts" in d.columns:
+            x_num = x.view("int64").astype(np.float64)
+        else:
+            x_num = x.astype(np.float64)
+        keep = lttb_indices(x_num, y.astype(np.float64), MAX_PLOT_POINTS)
+        x = x[keep]
+        y = y[keep]
+
+    unit = ""
+    if "param_unit" in d.columns:
+        u = d["param_unit"].dropna().astype(str).str.strip()
+        if not u.empty:
+            unit = u.iloc[0]
+
+    design = _first_num(all_param, "Design_Value")
+
+    fig = go.Figure()
+
+    # Sigma-zone bucket per point: 0/1/2 = green/amber/red, one uint8 array
+    # built in a single pass (JIT'd when numba is installed)
+    bucket = classify_zones(y, mean, sigma)
+    if colorize:
+        colors = np.array([GREEN, AMBER, RED])[bucket]
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, mode="lines+markers",
+            line=dict(color=LINE_GRAY, width=1),
+            marker=dict(color=colors, size=6),
+            name="Value", showlegend=True,
+        ))
+    else:
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, mode="lines",
+            line=dict(width=1.6), name="Value",
+        ))
+        ooc = bucket == 2
+        if np.count_nonzero(ooc):
+            fig.add_trace(go.Scattergl(
+                x=x[ooc], y=y[ooc], mode="markers",
+                marker=dict(color=RED, size=7), showlegend=False,
+            ))
+
+    # Control lines as shapes (cheap; no extra traces)
+    fig.add_hline(y=mean, line=dict(color="#333", width=1), annotation_text="Mean",
+                  annotation_position="top left")
+    fig.add_hline(y=UCL, line=dict(color="#666", width=1, dash="dash"), annotation_text="UCL 3σ",
+                  annotation_position="top left")
+    fig.add_hline(y=LCL, line=dict(color="#666", width=1, dash="dash"), annotation_text="LCL −3σ",
+                  annotation_position="bottom left")
+    if design is not None:
+        fig.add_hline(y=design, line=dict(color=DESIGN_COLOR, width=2.6), annotation_text="Design",
+                      annotation_position="top right")
+
+    fig.update_layout(
+        height=420,
+        margin=dict(l=40, r=20, t=30, b=40),
+        xaxis_title="Time" if "ts" in d.columns else "Index",
+        yaxis_title=f"Value [{unit}]" if unit else "Value",
+        showlegend=False,
+        plot_bgcolor="white",
+        title=dict(text=param_name, x=0.5, y=0.02, yanchor="bottom",
+                   font=dict(size=12, color="tomato")),
+    )
+    return fig
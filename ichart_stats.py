@@ -0,0 +1,126 @@
+# ichart_stats.py
+# Individuals-chart (I-chart) statistics, used as the fallback when an export
+# CSV does not carry precomputed *_Mean_Value / *_Sigma_Value columns.
+# Vectorized with numpy (np.diff / np.mean — no Python loops) and memoized on a
+# cheap array fingerprint so repeat builds for the same (file, tag) are O(1).
+
+import numpy as np
+
+try:  # optional: JIT the per-point classification loop when numba is around
+    import numba
+except ImportError:
+    numba = None
+
+# d2 constant for subgroup size 2: sigma-hat = MR_bar / 1.128, so the classic
+# I-chart limits mean ± 2.66·MR_bar equal mean ± 3·sigma-hat.
+_D2 = 1.128
+
+_CACHE = {}
+_CACHE_MAX = 256
+
+def _fingerprint(y: np.ndarray):
+    # Cheap content key: shape/dtype plus a few boundary values. Good enough to
+    # distinguish the handful of (file, tag) series this app ever sees.
+    return (y.shape, y.dtype.str, y[:8].tobytes(), y[-8:].tobytes())
+
+def ichart_mean_sigma(values) -> tuple:
+    """Return (mean, sigma_hat) for an individuals chart.
+
+    sigma_hat is estimated from the mean moving range (MR_bar / d2), the
+    standard I-chart estimator — robust to slow drift, unlike the plain
+    standard deviation.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    y = y[np.isfinite(y)]
+    if y.size == 0:
+        raise ValueError("ichart_mean_sigma needs at least one finite value.")
+    key = _fingerprint(y)
+    hit = _CACHE.get(key)
+    if hit is not None:
+        return hit
+    mean = float(y.mean())
+    if y.size < 2:
+        result = (mean, 0.0)
+    else:
+        # float32 halves the bytes moved through the moving-range reduction;
+        # display-grade precision is ample here. No Python loop, no
+        # rolling().apply() — np.diff/np.mean stay in C.
+        mr_bar = float(np.abs(np.diff(y.astype(np.float32))).mean(dtype=np.float64))
+        result = (mean, mr_bar / _D2)
+    if len(_CACHE) >= _CACHE_MAX:
+        _CACHE.clear()
+    _CACHE[key] = result
+    return result
+
+def _classify_numpy(y: np.ndarray, mean: float, sigma: float) -> np.ndarray:
+    z = np.abs(y - mean)
+    return np.digitize(z, (sigma, 3.0 * sigma), right=True).astype(np.uint8)
+
+if numba is not None:
+    @numba.njit(cache=True, fastmath=True)
+    def _classify_jit(y, mean, sigma):  # pragma: no cover - needs numba
+        n = y.shape[0]
+        out = np.empty(n, np.uint8)
+        s1 = sigma
+        s3 = 3.0 * sigma
+        for i in range(n):
+            d = abs(y[i] - mean)
+            out[i] = 0 if d <= s1 else (2 if d > s3 else 1)
+        return out
+
+def classify_zones(y, mean: float, sigma: float) -> np.ndarray:
+    """Sigma-zone bucket per point: 0 = within ±1σ, 1 = 1σ–3σ, 2 = beyond 3σ.
+
+    One uint8 array, produced in a single pass — the numba loop when available
+    (no intermediate z/bool arrays at all), else digitize on |y − mean|.
+    """
+    y = np.ascontiguousarray(y)
+    if numba is not None:
+        return _classify_jit(y, float(mean), float(sigma))
+    return _classify_numpy(y, float(mean), float(sigma))
+
+def ichart_stats(values) -> tuple:
+    """Return (mean, UCL, LCL) with UCL/LCL = mean ± 3·sigma_hat (= ± 2.66·MR_bar)."""
+    mean, sigma = ichart_mean_sigma(values)
+    return mean, mean + 3.0 * sigma, mean - 3.0 * sigma
+
+class RunningIChartStats:
+    """Incremental I-chart accumulator: fold in newly appended values in O(Δ)
+    instead of recomputing over the whole series per click.
+
+    Tracks the running mean (merged batch-wise, numerically stable for this
+    data) and the cumulative moving-range sum, carrying the last value across
+    batches so the bridge range is counted.
+    """
+    __slots__ = ("n", "mean", "mr_sum", "_last")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.mr_sum = 0.0
+        self._last = None
+
+    def update(self, values):
+        y = np.asarray(values, dtype=np.float64)
+        y = y[np.isfinite(y)]
+        if y.size == 0:
+            return
+        if self._last is not None:
+            self.mr_sum += abs(float(y[0]) - self._last)
+        if y.size > 1:
+            self.mr_sum += float(np.abs(np.diff(y)).sum())
+        total = self.n + y.size
+        self.mean += (float(y.sum()) - y.size * self.mean) / total
+        self.n = total
+        self._last = float(y[-1])
+
+    @property
+    def sigma(self) -> float:
+        if self.n < 2:
+            return 0.0
+        return (self.mr_sum / (self.n - 1)) / _D2
+
+    def stats(self) -> tuple:
+        """(mean, UCL, LCL) from the running state — O(1)."""
+        s = self.sigma
+        return self.mean, self.mean + 3.0 * s, self.mean - 3.0 * s
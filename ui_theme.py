@@ -0,0 +1,101 @@
+# ui_theme.py
+# Theme constants and button CSS for the PowerPlay app, split out of app.py so
+# the entry script stays small and the style block is built in one place.
+
+import streamlit as st
+
+DARK_BLUE      = "#003366"
+LIGHT_GRAY     = "#F5F5F5"
+DARK_GRAY      = "#333333"
+SKY_BLUE       = "#87CEEB"
+EMERALD        = "#28a745"  # Go
+CORAL          = "#FF7F50"  # Back
+LOGOUT_YELLOW  = "#B8860B"  # Dark Yellow (DarkGoldenRod) for Logout
+
+@st.cache_data(show_spinner=False)
+def _base_css() -> str:
+    """
+    Strong, DOM-targeted CSS so colors are not overridden by Streamlit theme.
+    - Primary buttons (Go/Back) use data-testid=baseButton-primary
+    - Secondary buttons (Logout) use data-testid=baseButton-secondary
+    Forces secondary text & border to dark yellow; background stays transparent if theme forces white.
+    Button colors come from CSS variables (--pp-primary/--pp-secondary), so the
+    block is fully static: per-screen color changes only swap the variables.
+    """
+    return (
+        f"""
+        <style>
+          :root {{ --pp-primary: {EMERALD}; --pp-secondary: {LOGOUT_YELLOW}; }}
+          .stApp {{ background-color: {LIGHT_GRAY}; }}
+          .pp-center {{ text-align: center; }}
+
+          .powerplay-header {{
+            color: {DARK_BLUE}; font-weight: 800; margin-bottom: 0.2rem;
+          }}
+          .powerplay-sub {{
+            color: {DARK_GRAY}; font-size: 0.95rem; margin-bottom: 1.0rem;
+          }}
+
+          .pp-card {{
+            background: white; border: 1.5px solid {DARK_BLUE};
+            border-radius: 8px; padding: 1rem 1rem 0.6rem 1rem;
+          }}
+          .pp-title {{ color: {DARK_BLUE}; font-weight: 700; margin-bottom: 0.5rem; }}
+          div[data-baseweb="select"] > div {{ background-color: {SKY_BLUE}10; border-radius: 6px; }}
+
+          .pp-plot {{
+            background: white; border: 2px solid {DARK_BLUE};
+            border-radius: 8px; padding: 0.5rem;
+          }}
+
+          .go-logout-row {{ margin-top: 0.40rem; }}
+
+          /* --- Primary buttons (Go / Back) --- */
+          button[data-testid="baseButton-primary"] {{
+            background-color: var(--pp-primary) !important;
+            color: #ffffff !important;
+            border: none !important;
+            border-radius: 6px !important;
+            padding: 0.5rem 1.0rem !important;
+            font-weight: 600 !important;
+          }}
+          button[data-testid="baseButton-primary"]:hover {{
+            filter: brightness(0.95);
+          }}
+
+          /* --- Secondary buttons (Logout) ---
+             Some Streamlit themes force white bg; ensure icon/text and border are dark yellow. */
+          button[data-testid="baseButton-secondary"] {{
+            color: var(--pp-secondary) !important;                /* icon/text color */
+            border: 2px solid var(--pp-secondary) !important;     /* border color */
+            border-radius: 8px !important;
+            padding: 0.50rem 0.85rem !important;
+            font-size: 1.05rem !important;  /* icon size */
+            background: transparent !important;                 /* leave bg as white/transparent */
+          }}
+          button[data-testid="baseButton-secondary"]:hover {{
+            filter: brightness(0.95);
+          }}
+
+          /* --- Fallbacks for older Streamlit builds --- */
+          div.stButton > button[kind="primary"] {{
+            background-color: var(--pp-primary) !important; color: #fff !important; border: none !important;
+          }}
+          div.stButton > button[kind="secondary"] {{
+            color: var(--pp-secondary) !important; border: 2px solid var(--pp-secondary) !important;
+            background: transparent !important; border-radius: 8px !important;
+          }}
+        </style>
+        """
+    )
+
+def inject_button_css(primary_color: str, secondary_color: str):
+    """Emit the static (cached) button CSS plus, when the requested colors
+    differ from the defaults, a tiny variable-override block. The browser only
+    re-styles; no duplicate rule set is ever sent."""
+    st.markdown(_base_css(), unsafe_allow_html=True)
+    if primary_color != EMERALD or secondary_color != LOGOUT_YELLOW:
+        st.markdown(
+            f"<style>:root {{ --pp-primary: {primary_color}; --pp-secondary: {secondary_color}; }}</style>",
+            unsafe_allow_html=True,
+        )